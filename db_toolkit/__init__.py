@@ -10,11 +10,12 @@ Modules
 - ssh : Create secure SSH tunnels using `sshtunnel`.
 - db_connection : Connect to PostgreSQL-compatible databases.
 - threaded_queries : Execute SQL queries in parallel by attribute.
+- async_queries : Execute SQL queries in parallel by attribute with asyncpg.
 - sync_queries : Run single SQL queries synchronously.
 - utils : Load and validate environment variables from `.env` files.
 """
 
-from .ssh import create_ssh_tunnel
+from .ssh import create_ssh_tunnel, close_all_tunnels
 from .db_connection import (
     get_connection,
     release_connection,
@@ -22,7 +23,13 @@ from .db_connection import (
     create_connection_pool
 )
 from .threaded_queries import run_parallel_queries
-from .sync_queries import run_query
+from .async_queries import (
+    create_async_pool,
+    close_async_pool,
+    run_parallel_queries_async,
+    run_parallel_queries_asyncpg
+)
+from .sync_queries import run_query, run_query_fast, run_query_batched
 from .utils import (
     load_env,
     get_env_variable,
@@ -30,20 +37,29 @@ from .utils import (
     safe_identifier,
     log_query_retry,
     log_query_failure,
+    close_query_logs,
 )
 
 __all__ = [
     "create_ssh_tunnel",
+    "close_all_tunnels",
     "create_connection_pool",
     "get_connection",
     "release_connection",
     "close_pool",
     "run_parallel_queries",
+    "create_async_pool",
+    "close_async_pool",
+    "run_parallel_queries_async",
+    "run_parallel_queries_asyncpg",
     "run_query",
+    "run_query_fast",
+    "run_query_batched",
     "load_env",
     "get_env_variable",
     "require_env",
     "safe_identifier",
     "log_query_retry",
     "log_query_failure",
+    "close_query_logs",
 ]
\ No newline at end of file
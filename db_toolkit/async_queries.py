@@ -0,0 +1,364 @@
+import asyncio
+import random
+import re
+from itertools import product
+import asyncpg
+import pandas as pd
+from tqdm import tqdm
+from db_toolkit.utils import log_query_retry, log_query_failure
+
+# Global asyncpg connection pool
+async_pool = None
+
+# Open pools keyed by (host, port, dbname, user, event loop)
+_async_pools = {}
+
+
+async def create_async_pool(host, port, dbname, user, password, minconn=1, maxconn=10):
+    """
+    Initialize a global asyncpg connection pool.
+
+    If an open pool for the same host, port, database and user already
+    exists on the running event loop, it is reused (and `minconn`/`maxconn`
+    are ignored). Either way, that pool becomes the global pool. An asyncpg
+    pool is bound to the event loop it was created on, so each loop gets its
+    own; pools left behind by loops that have since closed are discarded.
+
+    Parameters
+    ----------
+    host : str
+        The database host address.
+    port : int
+        The port number to connect to.
+    dbname : str
+        The name of the database.
+    user : str
+        Username used to authenticate.
+    password : str
+        Password used to authenticate.
+    minconn : int, default=1
+        Minimum number of connections to maintain in the pool.
+    maxconn : int, default=10
+        Maximum number of connections to maintain in the pool.
+
+    Returns
+    -------
+    asyncpg.Pool
+        The global pool.
+    """
+    global async_pool
+    loop = asyncio.get_running_loop()
+    key = (host, port, dbname, user, loop)
+
+    _discard_stale_pools()
+
+    pool = _async_pools.get(key)
+    if pool is None or pool.is_closing():
+        pool = await asyncpg.create_pool(
+            host=host,
+            port=port,
+            database=dbname,
+            user=user,
+            password=password,
+            min_size=minconn,
+            max_size=maxconn
+        )
+
+        # Another task may have registered a pool for the same key meanwhile
+        existing = _async_pools.get(key)
+        if existing is not None and not existing.is_closing():
+            await pool.close()
+            pool = existing
+        else:
+            _async_pools[key] = pool
+            print("[INFO] Async connection pool created successfully.")
+
+    async_pool = pool
+    return pool
+
+
+async def close_async_pool():
+    """
+    Close every pool created by `create_async_pool` on the running event loop.
+
+    Pools bound to other loops cannot be closed from here; those whose loop
+    has already closed are discarded.
+
+    Returns
+    -------
+    None
+    """
+    global async_pool
+    loop = asyncio.get_running_loop()
+    _discard_stale_pools()
+
+    keys = [key for key in _async_pools if key[-1] is loop]
+    if not keys:
+        return
+
+    for key in keys:
+        pool = _async_pools.pop(key)
+        if pool is async_pool:
+            async_pool = None
+        await pool.close()
+    print("All connections in the async pool have been closed.")
+
+
+def _discard_stale_pools():
+    # A closed loop can no longer run its pool's shutdown; drop the sockets directly
+    global async_pool
+    for key in [key for key in _async_pools if key[-1].is_closed()]:
+        pool = _async_pools.pop(key)
+        if pool is async_pool:
+            async_pool = None
+        try:
+            pool.terminate()
+        except Exception:
+            pass
+
+
+def _quote_identifier(name):
+    """
+    Quote a string or tuple (e.g., for schema.table) as a PostgreSQL identifier.
+
+    asyncpg has no equivalent of `psycopg2.sql`, so identifiers are quoted
+    client-side following PostgreSQL's rules (embedded quotes are doubled).
+
+    Parameters
+    ----------
+    name : str or tuple of str
+        A single identifier (e.g., 'table') or a qualified identifier (e.g., ('schema', 'table')).
+
+    Returns
+    -------
+    str
+        A safely quoted SQL identifier.
+    """
+    if isinstance(name, tuple):
+        if not all(isinstance(part, str) for part in name):
+            raise TypeError("All parts of the identifier tuple must be strings")
+        parts = name
+    elif isinstance(name, str):
+        parts = (name,)
+    else:
+        raise TypeError("Identifier must be a string or tuple of strings")
+    return ".".join('"' + part.replace('"', '""') + '"' for part in parts)
+
+
+def _to_numeric_placeholders(query, num_values):
+    """
+    Rewrite psycopg2-style `%s` placeholders into asyncpg's `$1, $2, ...` form.
+
+    When a query has more placeholders than values, the values are reused
+    cyclically (`$1, $2, $1, $2, ...`), matching how `run_parallel_queries`
+    repeats parameters. Escaped `%%` becomes a literal `%`.
+
+    Parameters
+    ----------
+    query : str
+        SQL query using `%s` placeholders.
+    num_values : int
+        Number of values bound to each execution of the query.
+
+    Returns
+    -------
+    str
+        The query using numeric placeholders.
+
+    Raises
+    ------
+    ValueError
+        If there are no values, or more values than placeholders.
+    """
+    if num_values < 1:
+        raise ValueError("[ERROR] At least one value is required per query.")
+
+    num_placeholders = query.count('%s')
+    if num_values > num_placeholders:
+        raise ValueError(
+            f"[ERROR] Too many input values ({num_values}) for {num_placeholders} placeholders in query."
+        )
+
+    counter = iter(range(num_placeholders))
+
+    def replace(match):
+        if match.group(0) == '%%':
+            return '%'
+        return f"${next(counter) % num_values + 1}"
+
+    return re.sub(r'%%|%s', replace, query)
+
+
+async def run_parallel_queries_async(
+    host, port, dbname, user, password,
+    query_template: str,
+    target_table,
+    distinct_sources: dict,
+    verbose: bool = True,
+    debug: bool = False,
+    max_combinations: int = None,
+    minconn: int = 1,
+    maxconn: int = 10,
+    max_retries: int = 3,
+    base_delay: float = 1,
+    timeout: float = None
+):
+    """
+    Execute a templated query for every combination of distinct attribute values using asyncpg.
+
+    Same contract as `run_parallel_queries`, but the fan-out runs as coroutines
+    on a single event loop over an asyncpg pool instead of threads over psycopg2.
+    Concurrency is bounded by `maxconn`.
+
+    Parameters
+    ----------
+    host : str
+        Database host.
+    port : int
+        Database port.
+    dbname : str
+        Database name.
+    user : str
+        Username for authentication.
+    password : str
+        Password for authentication.
+    query_template : str
+        SQL template with `{table}`, `{attribute_0}`, ... fields and `%s` placeholders.
+    target_table : str or tuple of str
+        Table substituted into `{table}`.
+    distinct_sources : dict
+        Mapping of attribute name to the table its distinct values are read from.
+    verbose : bool
+        If True, prints progress information.
+    debug : bool
+        If True, prints the query once and the row count of each combination.
+    max_combinations : int, optional
+        In debug mode, only run the first `max_combinations` combinations.
+    minconn : int, default=1
+        Minimum pool size, used if no pool for this database exists on the running loop.
+    maxconn : int, default=10
+        Maximum pool size, used if no pool for this database exists on the running loop.
+    max_retries : int, default=3
+        Attempts per combination before giving up.
+    base_delay : float, default=1
+        Base delay in seconds for exponential backoff between retries.
+    timeout : float, optional
+        Per-attempt timeout in seconds. No timeout if None.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The concatenated results of all queries.
+
+    Raises
+    ------
+    ValueError
+        If `distinct_sources` is empty.
+    """
+    if not distinct_sources:
+        raise ValueError("[ERROR] distinct_sources must map at least one attribute to its source table.")
+
+    pool = await create_async_pool(host, port, dbname, user, password, minconn, maxconn)
+    attributes = tuple(distinct_sources.keys())
+
+    attr_placeholders = {
+        f"attribute_{i}": attr for i, attr in enumerate(attributes)
+    }
+    final_query = _to_numeric_placeholders(
+        query_template.format(table=_quote_identifier(target_table), **attr_placeholders),
+        len(attributes)
+    )
+
+    async def fetch_distinct(attr, source_table):
+        if verbose:
+            print(f"[INFO] Fetching distinct values for attribute: {attr}")
+        async with pool.acquire() as conn:
+            rows = await conn.fetch(
+                f"SELECT DISTINCT {_quote_identifier(attr)} FROM {_quote_identifier(source_table)}"
+            )
+        return [row[0] for row in rows]
+
+    async def fetch_distinct_values():
+        values = await asyncio.gather(
+            *(fetch_distinct(attr, source_table) for attr, source_table in distinct_sources.items())
+        )
+        all_combinations = list(product(*values))
+
+        if debug and max_combinations:
+            all_combinations = all_combinations[:max_combinations]
+
+        return all_combinations
+
+    async def execute_query(values, pbar):
+        try:
+            for attempt in range(1, max_retries + 1):
+                try:
+                    async with pool.acquire() as conn:
+                        rows = await asyncio.wait_for(conn.fetch(final_query, *values), timeout)
+
+                    if debug:
+                        print(f"[DEBUG] Retrieved {len(rows)} rows for {values}")
+
+                    if not rows:
+                        return None
+
+                    return pd.DataFrame([tuple(row) for row in rows], columns=list(rows[0].keys()))
+
+                except Exception as e:
+                    error_msg = str(e) or type(e).__name__
+                    if attempt == max_retries:
+                        print(f"[ERROR] Query failed for values {values} after {max_retries} attempts: {error_msg}")
+                        log_query_failure(values, error_msg)
+                        return None
+                    else:
+                        log_query_retry(values, attempt, error_msg)
+                        delay = base_delay * (2 ** (attempt - 1)) + random.uniform(0, 0.5)
+                        print(f"[RETRY] Attempt {attempt} failed for values {values}. Retrying in {delay:.2f}s...")
+                        await asyncio.sleep(delay)
+        finally:
+            pbar.update(1)
+
+    distinct_values = await fetch_distinct_values()
+    total = len(distinct_values)
+
+    if verbose:
+        attr_names = ", ".join(attributes)
+        print(f"[INFO] Found {total} distinct combinations of ({attr_names})")
+
+    # The query is the same for every combination, so it is shown once
+    if debug:
+        print(f"[DEBUG] Query: {final_query}")
+
+    with tqdm(total=total, desc="Executing queries") as pbar:
+        results = await asyncio.gather(*(execute_query(val, pbar) for val in distinct_values))
+
+    results = [df for df in results if df is not None]
+    return pd.concat(results, ignore_index=True) if results else pd.DataFrame()
+
+
+def run_parallel_queries_asyncpg(*args, **kwargs):
+    """
+    Blocking wrapper around `run_parallel_queries_async`.
+
+    Runs the coroutine on a fresh event loop with `asyncio.run` and closes the
+    global async pool afterwards, so it can be used as a drop-in replacement
+    for `run_parallel_queries` from synchronous code. Must not be called from
+    a running event loop; await `run_parallel_queries_async` there instead.
+
+    Parameters
+    ----------
+    *args, **kwargs
+        Forwarded to `run_parallel_queries_async`.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The concatenated results of all queries.
+    """
+    async def run():
+        try:
+            return await run_parallel_queries_async(*args, **kwargs)
+        finally:
+            await close_async_pool()
+
+    return asyncio.run(run())
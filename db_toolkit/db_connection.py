@@ -1,13 +1,29 @@
+import logging
+import threading
 import psycopg2
 from psycopg2 import pool
 
+logger = logging.getLogger(__name__)
+
 # Global connection pool
 connection_pool = None
 
+# Open pools keyed by (host, port, dbname, user)
+_pools = {}
+_pool_lock = threading.Lock()
+
+# Pool each checked-out connection came from, keyed by id(conn)
+_conn_pools = {}
+
 def create_connection_pool(host, port, dbname, user, password, minconn=1, maxconn=10):
     """
     Initialize a global PostgreSQL connection pool.
 
+    Idempotent and thread-safe: if an open pool for the same host, port,
+    database and user already exists, it is reused (and `minconn`/`maxconn`
+    are ignored). Either way, that pool becomes the global pool used by
+    `get_connection` and `release_connection`.
+
     Parameters
     ----------
     host : str
@@ -23,25 +39,36 @@ def create_connection_pool(host, port, dbname, user, password, minconn=1, maxcon
     minconn : int, default=1
         Minimum number of connections to maintain in the pool.
     maxconn : int, default=10
-        Maximum number of connections to maintain in the pool.
+        Maximum number of connections to maintain in the pool. Should match
+        the number of threads sharing the pool (see `run_parallel_queries`'s
+        `max_workers`).
 
     Returns
     -------
-    None
-        Initializes the global connection pool for future use.
+    psycopg2.pool.ThreadedConnectionPool
+        The global connection pool.
     """
     global connection_pool
-    connection_pool = psycopg2.pool.SimpleConnectionPool(
-        minconn=minconn,
-        maxconn=maxconn,
-        host=host,
-        port=port,
-        dbname=dbname,
-        user=user,
-        password=password
-    )
-    if connection_pool:
-        print("[INFO] Connection pool created successfully.")
+    key = (host, port, dbname, user)
+
+    db_pool = _pools.get(key)
+    if db_pool is None or db_pool.closed:
+        with _pool_lock:
+            db_pool = _pools.get(key)
+            if db_pool is None or db_pool.closed:
+                db_pool = _pools[key] = psycopg2.pool.ThreadedConnectionPool(
+                    minconn=minconn,
+                    maxconn=maxconn,
+                    host=host,
+                    port=port,
+                    dbname=dbname,
+                    user=user,
+                    password=password
+                )
+                print("[INFO] Connection pool created successfully.")
+
+    connection_pool = db_pool
+    return db_pool
 
 
 def get_connection(host=None, port=None, dbname=None, user=None, password=None):
@@ -83,14 +110,23 @@ def get_connection(host=None, port=None, dbname=None, user=None, password=None):
             password=password
         )
     elif connection_pool:
-        return connection_pool.getconn()
+        db_pool = connection_pool
+        conn = db_pool.getconn()
+        _conn_pools[id(conn)] = db_pool
+        return conn
     else:
         raise Exception("Connection pool is not initialized and no parameters were given.")
 
 
 def release_connection(conn):
     """
-    Return a connection to the global pool.
+    Return a connection to the pool it was taken from.
+
+    The owning pool is the one that was global when `get_connection` handed
+    the connection out, even if another pool has become global since.
+    Connections that do not belong to a pool (direct connections from
+    `get_connection` with parameters) or that outlive a closed pool are
+    closed instead. Never raises.
 
     Parameters
     ----------
@@ -101,21 +137,42 @@ def release_connection(conn):
     -------
     None
     """
-    if connection_pool and conn:
+    if not conn:
+        return
+
+    try:
+        db_pool = _conn_pools.pop(id(conn), None)
+        if db_pool is None or db_pool.closed:
+            if db_pool is not None:
+                logger.debug("Connection pool is closed, closing connection.")
+            conn.close()
+            return
+
         try:
-            connection_pool.putconn(conn)
-        except Exception as e:
-            print(f"[WARNING] Could not return connection to pool: {e}")
+            db_pool.putconn(conn)
+        except pool.PoolError:
+            # Direct connection, or the pool was closed meanwhile
+            conn.close()
+    except Exception as e:
+        logger.warning(f"Could not return connection to pool: {e}")
 
 
 def close_pool():
     """
-    Close all connections in the global connection pool.
+    Close all connections in every pool created by `create_connection_pool`.
 
     Returns
     -------
     None
     """
-    if connection_pool:
-        connection_pool.closeall()
-        print("All connections in the pool have been closed.")
\ No newline at end of file
+    global connection_pool
+    with _pool_lock:
+        if not _pools:
+            return
+        for db_pool in _pools.values():
+            if not db_pool.closed:
+                db_pool.closeall()
+        _pools.clear()
+        _conn_pools.clear()
+        connection_pool = None
+    print("All connections in the pool have been closed.")
\ No newline at end of file
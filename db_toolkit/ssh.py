@@ -1,9 +1,19 @@
+import threading
 from sshtunnel import SSHTunnelForwarder
 
+# Active tunnels keyed by (ssh_host, ssh_port, ssh_username, remote_bind_address)
+_tunnel_registry = {}
+_registry_lock = threading.Lock()
+
 def create_ssh_tunnel(ssh_host, ssh_port, ssh_username, ssh_private_key, remote_bind_address, local_bind_address=('localhost', 0)):
     """
     Create and start an SSH tunnel for secure remote database access.
 
+    Tunnels are reused: if an active tunnel to the same SSH server, user and
+    remote address already exists, it is returned instead of dialing a new
+    SSH connection, so repeated calls skip the SSH handshake. In that case
+    `local_bind_address` is ignored.
+
     Parameters
     ----------
     ssh_host : str
@@ -23,14 +33,36 @@ def create_ssh_tunnel(ssh_host, ssh_port, ssh_username, ssh_private_key, remote_
     Returns
     -------
     sshtunnel.SSHTunnelForwarder
-        An active SSH tunnel object. Remember to call `tunnel.stop()` when done.
+        An active SSH tunnel object, possibly shared with other callers.
+        Call `close_all_tunnels()` when done.
+    """
+    key = (ssh_host, ssh_port, ssh_username, tuple(remote_bind_address))
+
+    with _registry_lock:
+        tunnel = _tunnel_registry.get(key)
+        if tunnel is not None and tunnel.is_active:
+            return tunnel
+
+        tunnel = SSHTunnelForwarder(
+            (ssh_host, ssh_port),
+            ssh_username=ssh_username,
+            ssh_private_key=ssh_private_key,
+            remote_bind_address=remote_bind_address,
+            local_bind_address=local_bind_address
+        )
+        tunnel.start()
+        _tunnel_registry[key] = tunnel
+        return tunnel
+
+def close_all_tunnels():
+    """
+    Stop every SSH tunnel created by `create_ssh_tunnel`.
+
+    Returns
+    -------
+    None
     """
-    tunnel = SSHTunnelForwarder(
-        (ssh_host, ssh_port),
-        ssh_username=ssh_username,
-        ssh_private_key=ssh_private_key,
-        remote_bind_address=remote_bind_address,
-        local_bind_address=local_bind_address
-    )
-    tunnel.start()
-    return tunnel
\ No newline at end of file
+    with _registry_lock:
+        for tunnel in _tunnel_registry.values():
+            tunnel.stop()
+        _tunnel_registry.clear()
@@ -1,6 +1,10 @@
 import pandas as pd
 import logging
+from urllib.parse import quote
+from uuid import uuid4
 from psycopg2 import sql
+from psycopg2.extensions import encodings
+from psycopg2.extras import execute_values
 from db_toolkit.db_connection import get_connection, release_connection
 
 # Configura logger
@@ -11,10 +15,19 @@ formatter = logging.Formatter('[%(asctime)s] %(levelname)s - %(message)s')
 handler.setFormatter(formatter)
 logger.addHandler(handler)
 
-def run_query(host, port, dbname, user, password, query: str, params: tuple = None, verbose: bool = False):
+def run_query(host, port, dbname, user, password, query: str, params: tuple = None, verbose: bool = False, chunksize: int = None, stream: bool = False):
     """
     Execute a single SQL query (synchronously) and return the results as a DataFrame.
 
+    If `chunksize` is given, returns an iterator of DataFrames of at most
+    `chunksize` rows instead, so the full result is never converted into a
+    single DataFrame. The connection is released once the iterator is
+    exhausted or closed.
+
+    If `stream` is True, rows are read through a server-side (named) cursor
+    in batches of 10000 (or `chunksize`). Each batch is converted to a
+    DataFrame as it arrives, so at most one batch is held as raw rows.
+
     Parameters
     ----------
     host : str
@@ -33,19 +46,27 @@ def run_query(host, port, dbname, user, password, query: str, params: tuple = No
         Parameters to be passed safely to the query using placeholders.
     verbose : bool
         If True, prints debug logs (query, params, row count, etc.)
+    chunksize : int, optional
+        Number of rows per DataFrame when iterating over the result.
+    stream : bool, default=False
+        If True, fetch rows incrementally with a server-side cursor.
 
     Returns
     -------
-    pandas.DataFrame
-        A DataFrame containing the result of the query.
+    pandas.DataFrame or iterator of pandas.DataFrame
+        A DataFrame containing the result of the query, or an iterator of
+        DataFrames if `chunksize` is given.
     """
+    if chunksize:
+        return _iter_query_chunks(host, port, dbname, user, password, query, params, verbose, chunksize, stream)
+
     if verbose:
         logger.debug(f"Connecting to {host}:{port} database '{dbname}' as user '{user}'")
     
     conn = get_connection(host, port, dbname, user, password)
     
     try:
-        with conn.cursor() as cur:
+        with _open_cursor(conn, stream) as cur:
             if verbose:
                 logger.debug("Executing query:")
                 logger.debug(query)
@@ -53,7 +74,157 @@ def run_query(host, port, dbname, user, password, query: str, params: tuple = No
                     logger.debug(f"With params: {params}")
 
             cur.execute(query, params)
-            rows = cur.fetchall()
+
+            if stream:
+                # Each batch is converted as soon as it arrives, so at most
+                # `itersize` rows are held as Python tuples at a time
+                frames = []
+                while True:
+                    rows = cur.fetchmany(cur.itersize)
+                    # Named cursors only describe their columns after the first fetch
+                    columns = [desc[0] for desc in cur.description]
+                    if not rows:
+                        break
+                    frames.append(pd.DataFrame(rows, columns=columns))
+                df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+            else:
+                rows = cur.fetchall()
+                columns = [desc[0] for desc in cur.description]
+                df = pd.DataFrame(rows, columns=columns)
+
+            if verbose:
+                logger.debug(f"Query returned {len(df)} rows")
+
+            return df
+    finally:
+        release_connection(conn)
+        if verbose:
+            logger.debug("Connection released.")
+
+
+def run_query_fast(host, port, dbname, user, password, query: str, params: tuple = None, verbose: bool = False, return_type: str = "pandas"):
+    """
+    Execute a single SQL query through ConnectorX and return the results as a DataFrame or Arrow table.
+
+    ConnectorX reads the result with the binary protocol straight into
+    columnar Arrow buffers, skipping the per-row Python tuples built by
+    `run_query`. Best suited to large results. Requires the optional
+    `connectorx` and `pyarrow` packages.
+
+    Parameters
+    ----------
+    host : str
+        Database host.
+    port : int
+        Database port.
+    dbname : str
+        Database name.
+    user : str
+        Username for authentication.
+    password : str
+        Password for authentication.
+    query : str
+        The SQL query string. Can include `%s` placeholders.
+    params : tuple, optional
+        Parameters bound client-side with psycopg2 before the query is sent,
+        since ConnectorX does not accept parameters. This opens a psycopg2
+        connection; pass a fully rendered query to avoid it.
+    verbose : bool
+        If True, prints debug logs (query, params, row count, etc.)
+    return_type : {"pandas", "arrow"}, default="pandas"
+        Whether to return a `pandas.DataFrame` or a `pyarrow.Table`.
+
+    Returns
+    -------
+    pandas.DataFrame or pyarrow.Table
+        The result of the query.
+    """
+    if return_type not in ("pandas", "arrow"):
+        raise ValueError(f"Unknown return_type: {return_type!r}")
+
+    try:
+        import connectorx as cx
+    except ImportError as e:
+        raise ImportError(
+            "run_query_fast requires connectorx and pyarrow: pip install connectorx pyarrow"
+        ) from e
+
+    if params:
+        conn = get_connection(host, port, dbname, user, password)
+        try:
+            with conn.cursor() as cur:
+                query = cur.mogrify(query, params).decode(encodings[conn.encoding])
+        finally:
+            release_connection(conn)
+
+    if verbose:
+        logger.debug("Executing query with ConnectorX:")
+        logger.debug(query)
+
+    uri = f"postgresql://{quote(user, safe='')}:{quote(password, safe='')}@{host}:{port}/{quote(dbname, safe='')}"
+    table = cx.read_sql(uri, query, return_type="arrow")
+
+    if verbose:
+        logger.debug(f"Query returned {table.num_rows} rows")
+
+    return table if return_type == "arrow" else table.to_pandas()
+
+
+def run_query_batched(host, port, dbname, user, password, query, params_list: list, page_size: int = 100, template=None, verbose: bool = False):
+    """
+    Execute a query for many parameter tuples in a few statements and return the combined results as a DataFrame.
+
+    The query must contain a single `%s` placeholder, which psycopg2's
+    `execute_values` expands into a list of up to `page_size` tuples per
+    statement, e.g. `SELECT * FROM t WHERE (a, b) IN (VALUES %s)`. This sends
+    one statement per page instead of one per tuple.
+
+    Parameters
+    ----------
+    host : str
+        Database host.
+    port : int
+        Database port.
+    dbname : str
+        Database name.
+    user : str
+        Username for authentication.
+    password : str
+        Password for authentication.
+    query : str or psycopg2.sql.Composable
+        The SQL query with a single `%s` placeholder for the tuple list.
+    params_list : list of tuple
+        Parameter tuples to expand into the query.
+    page_size : int, default=100
+        Maximum number of tuples per statement.
+    template : str or psycopg2.sql.Composable, optional
+        Snippet used to render each tuple, e.g. `(%s::uuid, %s)`. Defaults to
+        a plain `(%s, %s, ...)` matching the tuple length.
+    verbose : bool
+        If True, prints debug logs (query, params, row count, etc.)
+
+    Returns
+    -------
+    pandas.DataFrame
+        A DataFrame containing the rows returned by all statements. Empty if
+        `params_list` is empty.
+    """
+    # execute_values sends nothing for an empty list, so there is no result to read
+    if not params_list:
+        return pd.DataFrame()
+
+    if verbose:
+        logger.debug(f"Connecting to {host}:{port} database '{dbname}' as user '{user}'")
+
+    conn = get_connection(host, port, dbname, user, password)
+
+    try:
+        with conn.cursor() as cur:
+            if verbose:
+                logger.debug(f"Executing query for {len(params_list)} parameter tuples in pages of {page_size}:")
+                logger.debug(query if isinstance(query, str) else query.as_string(conn))
+
+            rows = execute_values(cur, query, params_list, template=template, page_size=page_size, fetch=True)
             columns = [desc[0] for desc in cur.description]
 
             if verbose:
@@ -63,4 +234,46 @@ def run_query(host, port, dbname, user, password, query: str, params: tuple = No
     finally:
         release_connection(conn)
         if verbose:
-            logger.debug("Connection released.")
\ No newline at end of file
+            logger.debug("Connection released.")
+
+
+def _open_cursor(conn, stream, itersize=10000):
+    if not stream:
+        return conn.cursor()
+
+    cur = conn.cursor(name=f"stream_{uuid4().hex}")
+    cur.itersize = itersize
+    return cur
+
+
+def _iter_query_chunks(host, port, dbname, user, password, query, params, verbose, chunksize, stream):
+    if verbose:
+        logger.debug(f"Connecting to {host}:{port} database '{dbname}' as user '{user}'")
+
+    conn = get_connection(host, port, dbname, user, password)
+
+    try:
+        with _open_cursor(conn, stream, chunksize) as cur:
+            if verbose:
+                logger.debug("Executing query:")
+                logger.debug(query)
+                if params:
+                    logger.debug(f"With params: {params}")
+
+            cur.execute(query, params)
+
+            while True:
+                rows = cur.fetchmany(chunksize)
+                if not rows:
+                    break
+
+                columns = [desc[0] for desc in cur.description]
+
+                if verbose:
+                    logger.debug(f"Fetched chunk of {len(rows)} rows")
+
+                yield pd.DataFrame(rows, columns=columns)
+    finally:
+        release_connection(conn)
+        if verbose:
+            logger.debug("Connection released.")
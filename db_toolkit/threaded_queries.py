@@ -1,14 +1,26 @@
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from itertools import islice, product
+from math import prod
 from psycopg2 import sql
+from psycopg2.extensions import encodings
 import pandas as pd
 from tqdm import tqdm
 from db_toolkit.utils import safe_identifier
 import threading
-from itertools import product
 from db_toolkit.db_connection import get_connection, release_connection, create_connection_pool
+from db_toolkit.sync_queries import run_query_fast, run_query_batched
 from db_toolkit.utils import log_query_retry, log_query_failure
 import time
 import random
+import logging
+
+# Configure logger
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+handler = logging.StreamHandler()
+formatter = logging.Formatter('[%(asctime)s] %(levelname)s - %(message)s')
+handler.setFormatter(formatter)
+logger.addHandler(handler)
 
 def run_parallel_queries(
     host, port, dbname, user, password,
@@ -17,84 +29,281 @@ def run_parallel_queries(
     distinct_sources: dict,
     verbose: bool = True,
     debug: bool = False,
-    max_combinations: int = None
+    max_combinations: int = None,
+    strategy: str = "threaded",
+    batch_size: int = 64,
+    max_workers: int = 10,
+    prune_empty: bool = False
 ):
-    create_connection_pool(host, port, dbname, user, password)
+    """
+    Execute a templated query for every combination of distinct attribute values.
+
+    Only the distinct values of each attribute are fetched; combinations are
+    generated lazily and handed to the workers a few batches at a time, so
+    the full Cartesian product is never held in memory (except by the
+    "join" strategy, which sends it as one `VALUES` list). With
+    `prune_empty`, the populated combinations are computed by PostgreSQL and
+    streamed through a server-side cursor.
+
+    Parameters
+    ----------
+    host : str
+        Database host.
+    port : int
+        Database port.
+    dbname : str
+        Database name.
+    user : str
+        Username for authentication.
+    password : str
+        Password for authentication.
+    query_template : str
+        SQL template with `{table}`, `{attribute_0}`, ... fields and `%s` placeholders.
+    target_table : str or tuple of str
+        Table substituted into `{table}`.
+    distinct_sources : dict
+        Mapping of attribute name to the table its distinct values are read from.
+    verbose : bool
+        If True, prints progress information (logged every 100 completed tasks).
+    debug : bool
+        If True, prints each query, the worker running it and its row count.
+    max_combinations : int, optional
+        In debug mode, only run the first `max_combinations` combinations.
+    strategy : {"threaded", "pipeline", "join", "arrow"}, default="threaded"
+        "threaded" runs one query per round-trip on pooled psycopg2 connections.
+        "pipeline" sends `batch_size` queries back-to-back on one psycopg 3
+        connection using libpq pipeline mode, so each batch costs about one
+        round-trip. Requires `psycopg` 3 and PostgreSQL 14+, otherwise falls
+        back to "threaded".
+        "join" runs a single query joining `target_table` against a `VALUES`
+        list of all combinations. `query_template` is not used: the result is
+        that of `SELECT * FROM {table} WHERE {attribute_0} = %s AND ...`.
+        "arrow" renders `batch_size` queries into one `UNION ALL` statement
+        and reads it with `run_query_fast` (ConnectorX), then concatenates
+        the Arrow tables before converting to pandas once. Pays off for
+        large partial results. Requires `connectorx` and `pyarrow`.
+    batch_size : int, default=64
+        Number of queries per pipeline or `UNION ALL` statement when
+        `strategy` is "pipeline" or "arrow".
+    max_workers : int, default=10
+        Number of worker threads. Also used as the pool's `maxconn`, so every
+        worker can hold a connection: the pool raises instead of waiting when
+        it runs out of connections, and surplus workers would only burn
+        retries. Capped at the `maxconn` of an already existing pool.
+    prune_empty : bool, default=False
+        If True, only combinations that occur in `target_table` are queried,
+        skipping those that cannot return rows. Only valid when the template
+        filters `target_table` by equality on every attribute.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The concatenated results of all queries.
+
+    Raises
+    ------
+    ValueError
+        If `strategy` is unknown or `distinct_sources` is empty.
+    """
+    if strategy not in ("threaded", "pipeline", "join", "arrow"):
+        raise ValueError(f"Unknown strategy: {strategy!r}")
+    if not distinct_sources:
+        raise ValueError("[ERROR] distinct_sources must map at least one attribute to its source table.")
+
+    db_pool = create_connection_pool(host, port, dbname, user, password, maxconn=max_workers)
+    max_workers = min(max_workers, db_pool.maxconn)
     attributes = tuple(distinct_sources.keys())
 
-    def fetch_distinct_values():
-        values_by_attribute = {}
-        conn = get_connection(host, port, dbname, user, password)
-        try:
-            with conn.cursor() as cur:
-                for attr, source_table in distinct_sources.items():
-                    if verbose:
-                        print(f"[INFO] Fetching distinct values for attribute: {attr}")
-                    cur.execute(
-                        sql.SQL("SELECT DISTINCT {attr} FROM {tbl}").format(
+    attr_placeholders = {
+        f"attribute_{i}": attr for i, attr in enumerate(attributes)
+    }
+    final_query = sql.SQL(query_template.format(table="{table}", **attr_placeholders)).format(
+        table=safe_identifier(target_table),
+        **attr_placeholders
+    )
+
+    # Every combination has the same shape, so the parameter expansion is fixed per run
+    num_placeholders = query_template.count('%s')
+    num_attrs = len(attributes)
+
+    if num_attrs > num_placeholders and strategy != "join":
+        raise ValueError(
+            f"[ERROR] Too many input values ({num_attrs}) for {num_placeholders} placeholders in query."
+        )
+
+    if num_placeholders == num_attrs:
+        prepare_params = tuple
+    else:
+        repeats = (num_placeholders + num_attrs - 1) // num_attrs
+
+        def prepare_params(value_tuple):
+            return tuple((tuple(value_tuple) * repeats)[:num_placeholders])
+
+    def iter_distinct_values():
+        # Returns (count, iterator); the combinations themselves are never collected in a list
+        if not prune_empty:
+            # Only sum(c_i) distinct values cross the wire; the product is walked lazily
+            conn = get_connection()
+            try:
+                with conn.cursor() as cur:
+                    values = []
+                    for attr, source_table in distinct_sources.items():
+                        if verbose:
+                            print(f"[INFO] Fetching distinct values for attribute: {attr}")
+                        cur.execute(sql.SQL("SELECT DISTINCT {attr} FROM {tbl}").format(
                             attr=safe_identifier(attr),
                             tbl=safe_identifier(source_table)
-                        )
-                    )
-                    values = [row[0] for row in cur.fetchall()]
-                    values_by_attribute[attr] = values
-        finally:
-            release_connection(conn)
+                        ))
+                        values.append([row[0] for row in cur.fetchall()])
+            finally:
+                release_connection(conn)
+
+            count = prod(len(v) for v in values)
+            combinations = product(*values)
+            if debug and max_combinations:
+                count = min(count, max_combinations)
+                combinations = islice(combinations, max_combinations)
+            return count, (values for values in combinations)
+
+        if verbose:
+            print(f"[INFO] Fetching populated combinations of ({', '.join(attributes)})")
 
-        all_combinations = list(product(*values_by_attribute.values()))
+        if all(source == target_table for source in distinct_sources.values()):
+            # Every distinct tuple of the target table is a populated combination
+            query = sql.SQL("SELECT DISTINCT {columns} FROM {table}").format(
+                columns=sql.SQL(", ").join(safe_identifier(attr) for attr in attributes),
+                table=safe_identifier(target_table)
+            )
+        else:
+            subqueries = [
+                sql.SQL("(SELECT DISTINCT {attr} FROM {tbl}) {alias}").format(
+                    attr=safe_identifier(attr),
+                    tbl=safe_identifier(source_table),
+                    alias=sql.Identifier(f"d{i}")
+                )
+                for i, (attr, source_table) in enumerate(distinct_sources.items())
+            ]
+            query = sql.SQL("SELECT {columns} FROM {sources} WHERE EXISTS (SELECT 1 FROM {table} t WHERE {conditions})").format(
+                columns=sql.SQL(", ").join(
+                    sql.Identifier(f"d{i}", attr) for i, attr in enumerate(attributes)
+                ),
+                sources=sql.SQL(" CROSS JOIN ").join(subqueries),
+                table=safe_identifier(target_table),
+                conditions=sql.SQL(" AND ").join(
+                    sql.SQL("{target} = {source}").format(
+                        target=sql.Identifier("t", attr),
+                        source=sql.Identifier(f"d{i}", attr)
+                    )
+                    for i, attr in enumerate(attributes)
+                )
+            )
 
         if debug and max_combinations:
-            all_combinations = all_combinations[:max_combinations]
+            query = sql.SQL("{query} LIMIT {limit}").format(query=query, limit=sql.Literal(max_combinations))
 
-        return all_combinations
+        def stream():
+            # A direct connection, so the cursor doesn't take a pool slot from the workers
+            conn = get_connection(host, port, dbname, user, password)
+            try:
+                with conn.cursor(name="distinct_values") as cur:
+                    cur.itersize = 10000
+                    cur.execute(query)
+                    yield from cur
+            finally:
+                release_connection(conn)
 
-    def prepare_params(value_tuple, query_template):
-        num_placeholders = query_template.count('%s')
-        base_values = list(value_tuple)
+        # The filtered count is only known once the cursor is exhausted
+        return None, stream()
 
-        if len(base_values) < num_placeholders:
-            repeats = (num_placeholders + len(base_values) - 1) // len(base_values)
-            extended_values = (base_values * repeats)[:num_placeholders]
-        elif len(base_values) > num_placeholders:
-            raise ValueError(
-                f"[ERROR] Too many input values ({len(base_values)}) for {num_placeholders} placeholders in query."
-            )
-        else:
-            extended_values = base_values
+    # Each worker thread keeps one pooled connection (and, in pipeline mode,
+    # one psycopg 3 connection) for the whole run
+    thread_state = threading.local()
+    held_connections = []
+    pipeline_connections = []
+    held_lock = threading.Lock()
 
-        return tuple(extended_values)
+    def thread_connection():
+        conn = getattr(thread_state, "conn", None)
+        if conn is not None and not conn.closed:
+            return conn
 
-    def execute_query(values, max_retries=3, base_delay=1):
-        thread_name = threading.current_thread().name
-        if verbose:
-            print(f"[{thread_name}] Running for values: {values}")
+        if conn is not None:
+            drop_thread_connection()
 
-        for attempt in range(1, max_retries + 1):
-            conn = None
-            try:
-                conn = get_connection()
+        conn = get_connection()
+        # No BEGIN/ROLLBACK per query, and a failed query leaves the connection usable
+        conn.autocommit = True
+        thread_state.conn = conn
+        with held_lock:
+            held_connections.append(conn)
+        return conn
 
-                attr_placeholders = {
-                    f"attribute_{i}": attr for i, attr in enumerate(attributes)
-                }
-                query_str = query_template.format(table="{table}", **attr_placeholders)
+    def restore_and_release(conn):
+        if not conn.closed:
+            conn.autocommit = False
+        release_connection(conn)
 
-                final_query = sql.SQL(query_str).format(
-                    table=safe_identifier(target_table),
-                    **attr_placeholders
-                )
+    def drop_thread_connection():
+        conn = getattr(thread_state, "conn", None)
+        thread_state.conn = None
+        if conn is not None:
+            with held_lock:
+                held_connections.remove(conn)
+            restore_and_release(conn)
+
+    def pipeline_connection():
+        import psycopg
+
+        conn = getattr(thread_state, "pipeline_conn", None)
+        if conn is not None and not conn.closed:
+            return conn
+
+        if conn is not None:
+            drop_pipeline_connection()
+
+        conn = psycopg.connect(
+            host=host, port=port, dbname=dbname, user=user, password=password, autocommit=True
+        )
+        thread_state.pipeline_conn = conn
+        with held_lock:
+            pipeline_connections.append(conn)
+        return conn
+
+    def drop_pipeline_connection():
+        conn = getattr(thread_state, "pipeline_conn", None)
+        thread_state.pipeline_conn = None
+        if conn is not None:
+            with held_lock:
+                pipeline_connections.remove(conn)
+            conn.close()
+
+    def release_thread_connections():
+        with held_lock:
+            for conn in held_connections:
+                restore_and_release(conn)
+            held_connections.clear()
+            for conn in pipeline_connections:
+                conn.close()
+            pipeline_connections.clear()
 
-                params = prepare_params(values, query_template)
+    def execute_query(values, compiled_query, max_retries=3, base_delay=1):
+        if debug:
+            logger.debug(f"[{threading.current_thread().name}] Running for values: {values}")
+
+        for attempt in range(1, max_retries + 1):
+            try:
+                conn = thread_connection()
+                params = prepare_params(values)
 
                 if debug:
-                    print(f"[DEBUG] Attempt {attempt} - Query: {final_query.as_string(conn)}")
+                    logger.debug(f"Attempt {attempt} - Params: {params}")
 
                 with conn.cursor() as cur:
-                    cur.execute(final_query, params)
+                    cur.execute(compiled_query, params)
                     rows = cur.fetchall()
 
                     if debug:
-                        print(f"[DEBUG] Retrieved {len(rows)} rows for {values}")
+                        logger.debug(f"Retrieved {len(rows)} rows for {values}")
 
                     if not rows:
                         return None
@@ -112,38 +321,260 @@ def run_parallel_queries(
                     log_query_retry(values, attempt, error_msg)
                     delay = base_delay * (2 ** (attempt - 1)) + random.uniform(0, 0.5)
                     print(f"[RETRY] Attempt {attempt} failed for values {values}. Retrying in {delay:.2f}s...")
+                    # Don't hold a pooled connection while backing off; the next attempt takes a fresh one
+                    drop_thread_connection()
                     time.sleep(delay)
 
-            finally:
-                if conn:
-                    try:
-                        release_connection(conn)
-                    except Exception:
-                        pass
+    def pipeline_supported():
+        try:
+            import psycopg
+        except ImportError as e:
+            raise ImportError(
+                "strategy='pipeline' requires psycopg 3: pip install 'psycopg[binary]'"
+            ) from e
+
+        conn = get_connection()
+        try:
+            server_version = conn.server_version
+        finally:
+            release_connection(conn)
+
+        return psycopg.Pipeline.is_supported() and server_version >= 140000
+
+    def render_query():
+        conn = get_connection()
+        try:
+            return final_query.as_string(conn)
+        finally:
+            release_connection(conn)
+
+    def execute_pipeline(chunk, query_str):
+        if debug:
+            logger.debug(f"[{threading.current_thread().name}] Running pipeline for {len(chunk)} values")
+
+        try:
+            conn = pipeline_connection()
+            with conn.pipeline():
+                cursors = []
+                for values in chunk:
+                    cur = conn.cursor()
+                    cur.execute(query_str, prepare_params(values))
+                    cursors.append(cur)
+
+            frames = []
+            for values, cur in zip(chunk, cursors):
+                rows = cur.fetchall()
+
+                if debug:
+                    logger.debug(f"Retrieved {len(rows)} rows for {values}")
+
+                if not rows:
+                    frames.append(None)
+                    continue
+
+                columns = [desc[0] for desc in cur.description]
+                frames.append(pd.DataFrame(rows, columns=columns))
+                cur.close()
+            return frames
+
+        except Exception as e:
+            # The connection may be left mid-pipeline; the next chunk opens a fresh one
+            drop_pipeline_connection()
+            print(f"[RETRY] Pipeline failed for {len(chunk)} values ({e}). Retrying them one by one...")
+            return [execute_query(values, final_query) for values in chunk]
+
+    def render_union(chunk):
+        # Bound on the submitting thread, so workers only talk to ConnectorX
+        conn = get_connection()
+        try:
+            with conn.cursor() as cur:
+                return " UNION ALL ".join(
+                    "(" + cur.mogrify(final_query, prepare_params(values)).decode(encodings[conn.encoding]).strip().rstrip(";") + ")"
+                    for values in chunk
+                )
+        finally:
+            release_connection(conn)
+
+    def execute_arrow(chunk, batch_query, max_retries=3, base_delay=1):
+        if debug:
+            logger.debug(f"[{threading.current_thread().name}] Running UNION ALL of {len(chunk)} queries")
+
+        for attempt in range(1, max_retries + 1):
+            try:
+                table = run_query_fast(host, port, dbname, user, password, batch_query, return_type="arrow")
+
+                if debug:
+                    logger.debug(f"Retrieved {table.num_rows} rows for {len(chunk)} values")
+
+                return table if table.num_rows else None
+
+            except Exception as e:
+                error_msg = str(e)
+                if attempt == max_retries:
+                    print(f"[ERROR] Query failed for {len(chunk)} values after {max_retries} attempts: {e}")
+                    log_query_failure(chunk, error_msg)
+                    return None
+                else:
+                    log_query_retry(chunk, attempt, error_msg)
+                    delay = base_delay * (2 ** (attempt - 1)) + random.uniform(0, 0.5)
+                    print(f"[RETRY] Attempt {attempt} failed for {len(chunk)} values. Retrying in {delay:.2f}s...")
+                    time.sleep(delay)
+
+    def fetch_column_types():
+        conn = get_connection()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "SELECT attname, format_type(atttypid, NULL) FROM pg_attribute "
+                    "WHERE attrelid = %s::regclass AND attname = ANY(%s) AND attnum > 0 AND NOT attisdropped",
+                    (safe_identifier(target_table).as_string(conn), list(attributes))
+                )
+                column_types = dict(cur.fetchall())
+        finally:
+            release_connection(conn)
+
+        missing = [attr for attr in attributes if attr not in column_types]
+        if missing:
+            raise ValueError(f"[ERROR] Columns not found in target table: {', '.join(missing)}")
+
+        return [column_types[attr] for attr in attributes]
+
+    def execute_join(combinations, max_retries=3, base_delay=1):
+        keys = [f"key_{i}" for i in range(len(attributes))]
+        join_query = sql.SQL(
+            "WITH keys ({keys}) AS (VALUES %s) "
+            "SELECT t.* FROM {table} t JOIN keys ON {conditions}"
+        ).format(
+            keys=sql.SQL(", ").join(sql.Identifier(key) for key in keys),
+            table=safe_identifier(target_table),
+            conditions=sql.SQL(" AND ").join(
+                sql.SQL("t.{attr} = keys.{key}").format(
+                    attr=sql.Identifier(attr),
+                    key=sql.Identifier(key)
+                )
+                for attr, key in zip(attributes, keys)
+            )
+        )
+
+        # NULL never compares equal, so these combinations cannot match any row
+        combinations = [values for values in combinations if None not in values]
+
+        if verbose:
+            print(f"[INFO] Running a single join over {len(combinations)} distinct combinations")
+
+        if not combinations:
+            return pd.DataFrame()
 
-    distinct_values = fetch_distinct_values()
-    total = len(distinct_values)
+        # VALUES would type string literals as text, which has no `=` operator
+        # against uuid, enum, inet, ... columns; cast to the target column types
+        template = sql.SQL("({})").format(
+            sql.SQL(", ").join(sql.SQL("%s::" + column_type) for column_type in fetch_column_types())
+        )
 
-    if verbose:
+        for attempt in range(1, max_retries + 1):
+            try:
+                if debug:
+                    logger.debug(f"Attempt {attempt} - Join over {len(combinations)} combinations")
+
+                df = run_query_batched(
+                    host, port, dbname, user, password,
+                    join_query, combinations,
+                    page_size=len(combinations),
+                    template=template,
+                    verbose=debug
+                )
+
+                if debug:
+                    logger.debug(f"Retrieved {len(df)} rows for {len(combinations)} combinations")
+
+                return df
+
+            except Exception as e:
+                error_msg = str(e)
+                if attempt == max_retries:
+                    log_query_failure(attributes, error_msg)
+                    raise
+                else:
+                    log_query_retry(attributes, attempt, error_msg)
+                    delay = base_delay * (2 ** (attempt - 1)) + random.uniform(0, 0.5)
+                    print(f"[RETRY] Attempt {attempt} failed for join query. Retrying in {delay:.2f}s...")
+                    time.sleep(delay)
+
+    total, combinations = iter_distinct_values()
+
+    if strategy == "join":
+        return execute_join(combinations)
+
+    use_pipeline = strategy == "pipeline" and pipeline_supported()
+    if strategy == "pipeline" and not use_pipeline:
+        print("[INFO] Pipeline mode not supported by libpq or server (< PostgreSQL 14). Using threaded strategy.")
+
+    if verbose and total is not None:
         attr_names = ", ".join(attributes)
         print(f"[INFO] Found {total} distinct combinations of ({attr_names})")
 
-    results = []
-    with ThreadPoolExecutor() as executor:
-        futures = {executor.submit(execute_query, val): val for val in distinct_values}
-        with tqdm(total=total, desc="Executing queries") as pbar:
-            for future in as_completed(futures):
-                values = futures[future]
-                try:
-                    df = future.result()
-                    if df is not None:
-                        results.append(df)
-                except Exception as e:
-                    print(f"[ERROR] Query failed for values {values}: {e}")
-                finally:
-                    if verbose:
-                        active = threading.active_count()
-                        print(f"[PROGRESS] Completed values: {values} | Active workers: {active - 1}")
-                    pbar.update(1)
+    # Rendered once: per query, debug output only shows the parameters
+    query_str = render_query() if use_pipeline or debug else None
+    if debug and logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Query: {query_str}")
+
+    def submit(executor, chunk):
+        if use_pipeline:
+            return executor.submit(execute_pipeline, chunk, query_str)
+        if strategy == "arrow":
+            return executor.submit(execute_arrow, chunk, render_union(chunk))
+        return executor.submit(execute_query, chunk[0], final_query)
+
+    chunk_size = batch_size if use_pipeline or strategy == "arrow" else 1
+    chunks = iter(lambda: list(islice(combinations, chunk_size)), [])
+
+    # Frames per chunk index; only a bounded number of chunks is in flight,
+    # so combinations are pulled from the source as workers free up
+    chunk_results = {}
+    pending = {}
+    max_pending = 2 * max_workers
+    completed = 0
+
+    def collect(done, pbar):
+        nonlocal completed
+        for future in done:
+            index, chunk = pending.pop(future)
+            try:
+                frames = future.result()
+                chunk_results[index] = frames if use_pipeline else [frames]
+            except Exception as e:
+                print(f"[ERROR] Query failed for values {chunk}: {e}")
+            finally:
+                pbar.update(len(chunk))
+                completed += 1
+                if verbose and completed % 100 == 0:
+                    logger.debug(f"[PROGRESS] Completed {pbar.n}/{total or '?'} combinations")
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            with tqdm(total=total, desc="Executing queries", mininterval=0.5, miniters=max(1, (total or 0) // 100)) as pbar:
+                for index, chunk in enumerate(chunks):
+                    if len(pending) >= max_pending:
+                        collect(wait(pending, return_when=FIRST_COMPLETED).done, pbar)
+                    pending[submit(executor, chunk)] = (index, chunk)
+                collect(wait(pending).done, pbar)
+
+                if verbose:
+                    logger.debug(f"[PROGRESS] Completed {pbar.n}/{pbar.n} combinations")
+    finally:
+        combinations.close()
+        release_thread_connections()
+
+    results = [
+        frame for index in sorted(chunk_results) for frame in chunk_results[index]
+        if frame is not None
+    ]
+
+    if strategy == "arrow":
+        import pyarrow as pa
+
+        # concat_tables only references the partial tables' buffers, and
+        # self_destruct frees them as columns are converted
+        return pa.concat_tables(results).to_pandas(self_destruct=True) if results else pd.DataFrame()
 
     return pd.concat(results, ignore_index=True) if results else pd.DataFrame()
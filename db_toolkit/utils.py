@@ -1,8 +1,14 @@
 import os
+import threading
+from functools import lru_cache
 from dotenv import load_dotenv
 from psycopg2 import sql
 from datetime import datetime
 
+# Line-buffered append handles for the query logs, keyed by absolute path
+_log_files = {}
+_log_lock = threading.Lock()
+
 def load_env(dotenv_path=None):
     """
     Load environment variables from a `.env` file.
@@ -57,10 +63,13 @@ def require_env(keys):
     if missing:
         raise EnvironmentError(f"Missing required environment variables: {', '.join(missing)}")
     
+@lru_cache(maxsize=1024)
 def safe_identifier(name):
     """
     Creates a psycopg2.sql.Identifier from a string or tuple (e.g., for schema.table).
 
+    Results are cached, so repeated names share one Identifier object.
+
     Parameters
     ----------
     name : str or tuple of str
@@ -93,11 +102,8 @@ def log_query_failure(values, error_msg, log_file="query_failures.log"):
     log_file : str, optional
         The file path to write the log to. Defaults to 'query_failures.log'.
     """
-    from datetime import datetime
-
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    with open(log_file, "a") as f:
-        f.write(f"[{timestamp}] VALUES: {values} | ERROR: {error_msg}\n")
+    _write_log_line(log_file, f"[{timestamp}] VALUES: {values} | ERROR: {error_msg}\n")
 
 def log_query_retry(values, attempt, error_msg, log_file="query_retries.log"):
     """
@@ -114,8 +120,31 @@ def log_query_retry(values, attempt, error_msg, log_file="query_retries.log"):
     log_file : str, optional
         The file path to write the log to. Defaults to 'query_retries.log'.
     """
-    from datetime import datetime
-
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    with open(log_file, "a") as f:
-        f.write(f"[{timestamp}] RETRY {attempt} for VALUES: {values} | ERROR: {error_msg}\n")
\ No newline at end of file
+    _write_log_line(log_file, f"[{timestamp}] RETRY {attempt} for VALUES: {values} | ERROR: {error_msg}\n")
+
+def close_query_logs():
+    """
+    Close the log files kept open by `log_query_retry` and `log_query_failure`.
+
+    Files are reopened on the next write, so this can also be called after
+    rotating a log file to make subsequent lines go to the new file.
+
+    Returns
+    -------
+    None
+    """
+    with _log_lock:
+        for f in _log_files.values():
+            f.close()
+        _log_files.clear()
+
+def _write_log_line(log_file, line):
+    # Opened once per path and kept open; the lock keeps concurrent lines whole.
+    # Resolved on every write, so a relative path follows the working directory
+    path = os.path.abspath(log_file)
+    with _log_lock:
+        f = _log_files.get(path)
+        if f is None:
+            f = _log_files[path] = open(path, "a", buffering=1)
+        f.write(line)
\ No newline at end of file
@@ -7,7 +7,12 @@ setup(
     install_requires=[
         'pandas',
         'psycopg2-binary',
+        'asyncpg',
         'sshtunnel',
         'python-dotenv',
     ],
+    extras_require={
+        'pipeline': ['psycopg[binary]>=3.1'],
+        'arrow': ['connectorx', 'pyarrow'],
+    },
 )
\ No newline at end of file